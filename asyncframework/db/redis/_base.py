@@ -1,11 +1,33 @@
 # -*- coding:utf-8 -*-
-from typing import Optional, Iterable, Generator, Any, Type, TypeVar, Generic, List, Union, Tuple
+import sys
+from typing import Optional, Iterable, Iterator, Generator, Any, Type, TypeVar, Generic, List, Union, Tuple
+from itertools import islice
 from asyncframework.log.log import get_logger
 from packets import PacketBase
 from .connection import RedisConnection
 
 
-__all__ = ['RedisRecordFieldBase', 'RedisRecordBase']
+__all__ = ['RedisRecordFieldBase', 'RedisRecordBase', 'RedisRecordBatch']
+
+
+BATCH_SIZE = 512
+
+
+def batched(iterable: Iterable[Any], size: int) -> Generator:
+    """Lazy split iterable to the lists of the given size
+
+    Args:
+        iterable (Iterable[Any]): the source iterable
+        size (int): maximum size of the batch
+
+    Yields:
+        List[Any]: next batch
+    """
+    it = iter(iterable)
+    batch = list(islice(it, size))
+    while batch:
+        yield batch
+        batch = list(islice(it, size))
 
 
 class RedisRecordFieldBase():
@@ -13,40 +35,73 @@ class RedisRecordFieldBase():
     """
     prefix: Optional[str] = None
     expire: int = 0
+    key_sep: str = ''
     record_type: Type[PacketBase]
 
-    def __init__(self, prefix: Optional[str] = None, expire: int = 0):
+    def __init__(self, prefix: Optional[str] = None, expire: int = 0, key_sep: str = ''):
         """Constructor
 
         Args:
             prefix (Optional[str], optional): record key prefix. Defaults to None.
             expire (int, optional): expiration in seconds (0 - not expiring). Defaults to 0.
+            key_sep (str, optional): separator between prefix and key. Defaults to ''.
         """
-        self.prefix = prefix
+        self.prefix = sys.intern(prefix) if prefix else None
         self.expire = expire
+        self.key_sep = key_sep
+        self._prefixed = sys.intern(f'{prefix}{key_sep}') if prefix else ''
+        self._prefix_bytes = self._prefixed.encode('utf-8')
 
-    def full_key(self, key: str) -> str:
+    def full_key(self, key: Union[str, bytes]) -> Union[str, bytes]:
         """Return full key in redis using predefined prefix
 
         Args:
-            key (str): key name
+            key (Union[str, bytes]): key name
 
         Returns:
-            str: full key name including prefix if set
+            Union[str, bytes]: full key name including prefix if set
         """
-        return ''.join((self.prefix, key)) if self.prefix else key
+        if isinstance(key, bytes):
+            return self.full_key_bytes(key)
+        return self._prefixed + key if self._prefixed else key
+
+    def full_key_bytes(self, key: bytes) -> bytes:
+        """Return full key in redis as bytes using predefined prefix
 
-    def full_keys(self, keys: Iterable[str]) -> Generator:
+        Args:
+            key (bytes): key name
+
+        Returns:
+            bytes: full key name including prefix if set
+        """
+        return self._prefix_bytes + key if self._prefix_bytes else key
+
+    def full_keys_list(self, keys: Iterable[Union[str, bytes]]) -> List[bytes]:
+        """Build the list of full keys as bytes
+
+        Args:
+            keys (Iterable[Union[str, bytes]]): list of keys
+
+        Returns:
+            List[bytes]: full key names including prefix if set
+        """
+        prefix = self._prefix_bytes
+        if not prefix:
+            return [k.encode('utf-8') if isinstance(k, str) else k for k in keys]
+        return [prefix + (k.encode('utf-8') if isinstance(k, str) else k) for k in keys]
+
+    def full_keys(self, keys: Iterable[str]) -> Iterator[str]:
         """Lazy generate full keys from keys
 
         Args:
             keys (Iterable[str]): list of keys
 
-        Yields:
-            str: full key name including prefix if set
+        Returns:
+            Iterator[str]: full key names including prefix if set
         """
-        for key in keys:
-            yield(self.full_key(key))
+        if not self._prefixed:
+            return iter(keys)
+        return map(self._prefixed.__add__, keys)
 
     def clone(self):
         pass
@@ -54,16 +109,105 @@ class RedisRecordFieldBase():
 
 T = TypeVar('T', bound=RedisRecordFieldBase)
 
+
+class RedisRecordBatch():
+    """Batch of the commands to the record keys.
+    Commands are accumulated and sent in one pipeline on exit from the context,
+    the results are available in `results` in the order of calls.
+    """
+    def __init__(self, record: 'RedisRecordBase') -> None:
+        """Constructor
+
+        Args:
+            record (RedisRecordBase): the record to run the commands for
+        """
+        self._record_info = record._record_info
+        self._connection = record._connection
+        self._pipe = None
+        self.results: List[Any] = []
+
+    async def __aenter__(self) -> 'RedisRecordBatch':
+        self._pipe = self._connection.pipeline(transaction=False)
+        await self._pipe.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.results = await self._pipe.execute()
+        finally:
+            await self._pipe.__aexit__(exc_type, exc, tb)
+            self._pipe = None
+
+    def exists(self, key: str) -> 'RedisRecordBatch':
+        """Check if the key exists, the result is 1 or 0
+
+        Args:
+            key (str): key not including prefix
+
+        Returns:
+            RedisRecordBatch: the batch itself
+        """
+        self._pipe.exists(self._record_info.full_key(key))
+        return self
+
+    def expire(self, key: str) -> 'RedisRecordBatch':
+        """Set the record expiration timeout to the key.
+        The key of the not expiring record is made persistent with PERSIST.
+
+        Args:
+            key (str): key not including prefix
+
+        Returns:
+            RedisRecordBatch: the batch itself
+        """
+        if self._record_info.expire:
+            self._pipe.expire(self._record_info.full_key(key), self._record_info.expire)
+        else:
+            self._pipe.persist(self._record_info.full_key(key))
+        return self
+
+    def copy(self, src: str, dest: str, replace: bool = False) -> 'RedisRecordBatch':
+        """Copy the value of the key to another key
+
+        Args:
+            src (str): source key not including prefix
+            dest (str): destination key not including prefix
+            replace (bool, optional): overwrite the existing destination. Defaults to False.
+
+        Returns:
+            RedisRecordBatch: the batch itself
+        """
+        self._pipe.copy(self._record_info.full_key(src), self._record_info.full_key(dest), replace=replace)
+        return self
+
+    def delete(self, key: str) -> 'RedisRecordBatch':
+        """Delete the key with UNLINK
+
+        Args:
+            key (str): key not including prefix
+
+        Returns:
+            RedisRecordBatch: the batch itself
+        """
+        self._pipe.unlink(self._record_info.full_key(key))
+        return self
+
+
 class RedisRecordBase(Generic[T]):
     log = get_logger('typed_collection')
     _connection: RedisConnection
     _record_info: T
+    # records wrapping their commands with the key prefix don't pass unknown attributes to the connection
+    _forward_commands: bool = True
 
     def __init__(self, connection: RedisConnection, record_info: T) -> None:
         self._connection = connection
         self._record_info = record_info
 
     def __getattr__(self, item):
+        if item.startswith('__') or not self._forward_commands:
+            raise AttributeError(item)
         return getattr(self._connection, item)
 
     async def load(self, key: str) -> List[Any]:
@@ -72,9 +216,17 @@ class RedisRecordBase(Generic[T]):
     async def store(self, key, data, upsert=True):
         pass
 
+    def batch(self) -> RedisRecordBatch:
+        """Get the batch of commands sent in one round trip
+
+        Returns:
+            RedisRecordBatch: the batch context manager
+        """
+        return RedisRecordBatch(self)
+
     async def delete(self, key: Union[Union[List[str], Tuple[str]], str]) -> int:
         if isinstance(key, (list, tuple)):
-            to_delete = list(self._record_info.full_keys(key))
+            to_delete = self._record_info.full_keys_list(key)
         else:
             to_delete = [self._record_info.full_key(key)]
         return await self._connection.unlink(*to_delete)
@@ -82,3 +234,68 @@ class RedisRecordBase(Generic[T]):
     async def rename(self, src: str, dest: str) -> None:
         await self._connection.rename(self._record_info.full_key(src), self._record_info.full_key(dest))
 
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        """Delete many keys using one pipeline
+
+        Args:
+            keys (Iterable[str]): keys not including prefix
+
+        Returns:
+            int: amount of deleted keys
+        """
+        full = self._record_info.full_keys_list(keys)
+        if not full:
+            return 0
+        async with self._connection.pipeline(transaction=False) as pipe:
+            for batch in batched(full, BATCH_SIZE):
+                pipe.unlink(*batch)
+            return sum(await pipe.execute())
+
+    async def exists_many(self, keys: Iterable[str]) -> int:
+        """Count existing keys using one pipeline
+
+        Args:
+            keys (Iterable[str]): keys not including prefix
+
+        Returns:
+            int: amount of existing keys
+        """
+        full = self._record_info.full_keys_list(keys)
+        if not full:
+            return 0
+        async with self._connection.pipeline(transaction=False) as pipe:
+            for batch in batched(full, BATCH_SIZE):
+                pipe.exists(*batch)
+            return sum(await pipe.execute())
+
+    async def expire_many(self, keys: Iterable[str]) -> List[bool]:
+        """Set the record expiration timeout to many keys using one pipeline.
+        Keys of the not expiring record are made persistent.
+
+        Args:
+            keys (Iterable[str]): keys not including prefix
+
+        Returns:
+            List[bool]: the expiration result for each key
+        """
+        expire = self._record_info.expire
+        async with self._connection.pipeline(transaction=False) as pipe:
+            for key in self._record_info.full_keys_list(keys):
+                if expire:
+                    pipe.expire(key, expire)
+                else:
+                    pipe.persist(key)
+            return await pipe.execute()
+
+    async def rename_many(self, pairs: Iterable[Tuple[str, str]]) -> None:
+        """Rename many keys using one pipeline
+
+        Args:
+            pairs (Iterable[Tuple[str, str]]): (source, destination) pairs of keys not including prefix
+        """
+        full_key = self._record_info.full_key
+        async with self._connection.pipeline(transaction=False) as pipe:
+            for src, dest in pairs:
+                pipe.rename(full_key(src), full_key(dest))
+            await pipe.execute()
+
@@ -1,6 +1,7 @@
 # -*- coding:utf-8 -*-
 import asyncio
-from typing import Dict, Union, Sequence, List, Type, Hashable, Tuple
+from zlib import crc32
+from typing import Dict, Union, Sequence, List, Type, Tuple, Optional, Any, Callable, Awaitable
 from abc import ABCMeta
 from asyncframework.app.service import Service
 from asyncframework.log.log import get_logger
@@ -22,40 +23,61 @@ __all__ = ['RedisDb']
 
 
 config_type = Union[Sequence[Union[str, dict]], Union[str, dict]]
-key_type = Union[bytes, int]
+key_type = Union[bytes, str, int]
+
+
+# Maximum amount of shard connections being started or stopped concurrently
+MAX_CONCURRENT_SHARDS = 32
+
+
+_FIELD_MAP: Dict[Type[RedisRecordFieldBase], Type[RedisRecordBase]] = {
+    RedisLockField: RedisLock,
+    RedisScriptField: RedisScript,
+    RedisSetField: RedisSet,
+    RedisSortedSetField: RedisSortedSet,
+    RedisRecordField: RedisRecord,
+}
+
+
+def _record_class(field: RedisRecordFieldBase) -> Optional[Type[RedisRecordBase]]:
+    record_class = _FIELD_MAP.get(type(field))
+    if record_class is not None:
+        return record_class
+    for field_class, record_class in _FIELD_MAP.items():
+        if isinstance(field, field_class):
+            return record_class
+    return None
 
 
 class RedisDbMeta(ABCMeta):
     def __new__(cls, name, bases, namespace):
         records = {}
-        for name, value in list(namespace.items()):
+        for field_name, value in list(namespace.items()):
             if isinstance(value, RedisRecordFieldBase):
-                if isinstance(value, RedisLockField):
-                    records[name] = (value, RedisLock)
-                elif isinstance(value, RedisScriptField):
-                    records[name] = (value, RedisScript)
-                elif isinstance(value, RedisSetField):
-                    records[name] = (value, RedisSet)
-                elif isinstance(value, RedisSortedSetField):
-                    records[name] = (value, RedisSortedSet)
-                elif isinstance(value, RedisRecordField):
-                    records[name] = (value, RedisRecord)
-                del namespace[name]
+                record_class = _record_class(value)
+                if record_class:
+                    records[field_name] = (value, record_class)
+                del namespace[field_name]
         namespace['__records__'] = records
+        namespace['_shard_class'] = type('ShardObject', (ShardObject, ), {'__slots__': tuple(records.keys())})
         return super().__new__(cls, name, bases, namespace)
 
 
 class ShardObject():
-    pass
+    __slots__ = ()
 
 
 class RedisDb(Service, metaclass=RedisDbMeta):
     __records__: Dict[str, Tuple[RedisRecordFieldBase, RedisRecordBase]] = {}
+    _shard_class: Type[ShardObject]
     log = get_logger('typeddb')
 
     __shards: List[RedisConnection] = []
     __items: List[ShardObject] = []
     __sharded: bool = False
+    __shard_mask: Optional[int] = None
+    # set to False in a subclass to get bytes responses from all of its connections
+    decode_responses: bool = True
 
     @property
     def sharded(self) -> bool:
@@ -72,55 +94,141 @@ class RedisDb(Service, metaclass=RedisDbMeta):
         self.__shards = []
         self.__items = []
         self.__sharded = False
+        decode_responses = self.decode_responses
         if isinstance(config, (list, tuple)):
             for element_config in config:
                 if isinstance(element_config, str):
-                    conn = RedisConnection(element_config)
+                    conn = RedisConnection(element_config, decode_responses=decode_responses)
                 elif isinstance(element_config, dict):
-                    conn = RedisConnection.from_host_port(**element_config)
+                    conn = RedisConnection.from_host_port(**{'decode_responses': decode_responses, **element_config})
                 else:
                     raise TypeError(u'Ошибка конфига %s(%s)' % (element_config, type(element_config)))
                 self.__shards.append(conn)
                 self.__sharded = True
         elif isinstance(config, str):
-            conn = RedisConnection(config)
+            conn = RedisConnection(config, decode_responses=decode_responses)
             self.__shards.append(conn)
         elif isinstance(config, dict):
-            conn = RedisConnection.from_host_port(**config)
+            conn = RedisConnection.from_host_port(**{'decode_responses': decode_responses, **config})
             self.__shards.append(conn)
         else:
             raise TypeError('Ошибка конфига %s(%s)' % (config, type(config)))
+        shards = len(self.__shards)
+        self.__shard_mask = shards - 1 if shards & (shards - 1) == 0 else None
 
     @classmethod
     def with_records(cls, *records) -> Type['RedisDb']:
-        collections_set = set(records)
-        namespace = {collection_name: (cls.__records__[collection_name][0].clone(), cls.__records__[collection_name][1]) for collection_name in collections_set}
+        namespace = {collection_name: cls.__records__[collection_name][0].clone() for collection_name in set(records)}
         namespace['log'] = cls.log
+        namespace['decode_responses'] = cls.decode_responses
         partial_class = type(cls.__name__, cls.__bases__, namespace)
         return partial_class
 
     async def __start__(self, *args, **kwargs):
-        await asyncio.gather(*[connection.start() for connection in self.__shards])
-        for connection in self.__shards:
-            if self.__sharded:
-                shard = ShardObject()
-                for coll_name, (record_info, record_class) in self.__records__.items():
+        await self._for_all_shards(lambda connection: connection.start())
+        records_items = [(coll_name, record_class, record_info) for coll_name, (record_info, record_class) in self.__records__.items()]
+        if self.__sharded:
+            shard_class = self._shard_class
+            for connection in self.__shards:
+                shard = shard_class()
+                for coll_name, record_class, record_info in records_items:
                     setattr(shard, coll_name, record_class(connection, record_info))
                 self.__items.append(shard)
-            else:
-                for coll_name, (record_info, record_class) in self.__records__.items():
+        else:
+            for connection in self.__shards:
+                for coll_name, record_class, record_info in records_items:
                     setattr(self, coll_name, record_class(connection, record_info))
+        await self._preload_scripts()
+
+    async def _preload_scripts(self) -> None:
+        scripts = [coll_name for coll_name, (_, record_class) in self.__records__.items() if issubclass(record_class, RedisScript)]
+        if not scripts:
+            return
+        holders = self.__items if self.__sharded else [self]
+        await asyncio.gather(*[getattr(holder, coll_name).preload() for holder in holders for coll_name in scripts])
 
     async def __stop__(self):
-        await asyncio.gather(*[connection.stop() for connection in self.__shards])
+        await self._for_all_shards(lambda connection: connection.stop())
+
+    async def _for_all_shards(self, action: Callable[[RedisConnection], Awaitable[Any]]) -> None:
+        # runs the action for every shard with bounded concurrency, cancels the rest on the first failure
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_SHARDS)
+
+        async def run(connection: RedisConnection) -> None:
+            async with semaphore:
+                await action(connection)
+
+        tasks = [asyncio.ensure_future(run(connection)) for connection in self.__shards]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
 
     def __getitem__(self, key: key_type) -> ShardObject:
         if not self.__sharded:
             raise AttributeError('Not sharded DB')
-        shard_id = -1
+        return self.__items[self._shard_id(key)]
+
+    async def mget(self, record_name: str, keys: Sequence[str]) -> List[Any]:
+        """Get the records by keys from all the shards.
+        Keys are grouped by shard and every shard is read with one pipeline concurrently.
+
+        Args:
+            record_name (str): the name of the record field
+            keys (Sequence[str]): keys not including prefix
+
+        Raises:
+            AttributeError: if DB is not sharded
+            TypeError: if the field is not a plain record
+
+        Returns:
+            List[Any]: loaded values in the order of keys, None for missing keys
+        """
+        if not self.__sharded:
+            raise AttributeError('Not sharded DB')
+        record_info, record_class = self.__records__[record_name]
+        if not issubclass(record_class, RedisRecord):
+            raise TypeError(f'Record {record_name} is not a plain record')
+        groups: List[List[int]] = [[] for _ in self.__items]
+        for i, key in enumerate(keys):
+            groups[self._shard_id(key)].append(i)
+
+        async def shard_get(shard_id: int, indexes: List[int]) -> Tuple[List[int], List[Any]]:
+            record = getattr(self.__items[shard_id], record_name)
+            async with record._connection.pipeline(transaction=False) as pipe:
+                for i in indexes:
+                    pipe.get(record_info.full_key(keys[i]))
+                return indexes, await pipe.execute()
+
+        result: List[Any] = [None] * len(keys)
+        loads = record_info.load
+        for indexes, values in await asyncio.gather(*[shard_get(shard_id, indexes) for shard_id, indexes in enumerate(groups) if indexes]):
+            for i, value in zip(indexes, values):
+                if value is not None:
+                    result[i] = loads(value)
+        return result
+
+    def _shard_id(self, key: key_type) -> int:
+        """Get the shard index for the key.
+        Non integer keys are hashed with crc32, so the index is stable across processes.
+
+        Args:
+            key (key_type): the key
+
+        Returns:
+            int: the shard index
+        """
         if isinstance(key, int):
-            shard_id = key
-        elif isinstance(key, Hashable):
-            shard_id = hash(key) % len(self.__items)
-        assert 0 <= shard_id < len(self.__items)
-        return self.__items[shard_id]
+            h = key
+        elif isinstance(key, bytes):
+            h = crc32(key)
+        elif isinstance(key, str):
+            h = crc32(key.encode('utf-8'))
+        else:
+            h = crc32(repr(key).encode('utf-8'))
+        if self.__shard_mask is not None:
+            return h & self.__shard_mask
+        return h % len(self.__shards)
@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
-from typing import Optional
+from typing import Optional, Tuple, Any, Union
+from redis.asyncio.connection import Connection
+from redis.exceptions import NoScriptError, ResponseError
 from asyncframework.log.log import get_logger
 from .script_field import RedisScriptField, RedisScriptData
 from .script import RedisScript
@@ -12,6 +14,26 @@ __all__ = ['RedisLock', 'RedisLockError', 'RedisLockInvalidTimeoutError']
 
 
 logger = get_logger(__name__)
+# Expiration of the wake up token of the locks without expiration in milliseconds
+SIGNAL_EXPIRE_MS = b'60000'
+
+
+class AcquireScript(RedisScriptData):
+    code = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return 2
+end
+local acquired
+if tonumber(ARGV[2]) > 0 then
+    acquired = redis.call("set", KEYS[1], ARGV[1], "NX", "PX", ARGV[2])
+else
+    acquired = redis.call("set", KEYS[1], ARGV[1], "NX")
+end
+if acquired then
+    return 0
+end
+return 1
+"""
 
 
 class UnlockScript(RedisScriptData):
@@ -21,6 +43,7 @@ if redis.call("get", KEYS[1]) ~= ARGV[1] then
 else
     redis.call("del", KEYS[2])
     redis.call("lpush", KEYS[2], 1)
+    redis.call("pexpire", KEYS[2], ARGV[2])
     redis.call("del", KEYS[1])
     return 0
 end
@@ -31,10 +54,20 @@ class ResetScript(RedisScriptData):
     code = """
 redis.call('del', KEYS[2])
 redis.call('lpush', KEYS[2], 1)
+redis.call('pexpire', KEYS[2], ARGV[1])
 return redis.call('del', KEYS[1])
 """
 
 
+_ACQUIRE = RedisScriptField(AcquireScript())
+_UNLOCK = RedisScriptField(UnlockScript())
+_RESET = RedisScriptField(ResetScript())
+
+
+def _build_scripts(connection: RedisConnection) -> Tuple[RedisScript, RedisScript, RedisScript]:
+    return RedisScript(connection, _ACQUIRE), RedisScript(connection, _UNLOCK), RedisScript(connection, _RESET)
+
+
 class RedisLockError(RuntimeError):
     pass
 
@@ -53,7 +86,7 @@ class RedisLock(RedisRecordBase):
     class RealLock():
         """Redis lock object
         """
-        def __init__(self, connection: RedisConnection, id: str, prefix: Optional[str], name: str, expire: int):
+        def __init__(self, connection: RedisConnection, id: str, prefix: Optional[str], name: str, expire: int, scripts: Optional[Tuple[RedisScript, RedisScript, RedisScript]] = None):
             """Constructor
 
             Args:
@@ -62,23 +95,26 @@ class RedisLock(RedisRecordBase):
                 prefix (Optional[str], optional): lock prefix
                 name (str): lock name
                 expire (int): expiration timeout in seconds
+                scripts (Optional[Tuple[RedisScript, RedisScript, RedisScript]], optional): acquire, unlock and reset scripts. Defaults to the new ones.
             """
             super().__init__()
             self._client: RedisConnection = connection
             self._id: str = id
-            self._name: str = f'{prefix}:{name}' if prefix else name
-            self._signal: str = f'{prefix}-signal:{name}' if prefix else f'signal:{name}'
+            self._id_bytes: bytes = id.encode('utf-8')
+            self._title: str = f'{prefix}:{name}' if prefix else name
+            self._name: bytes = self._title.encode('utf-8')
+            self._signal: bytes = (f'{prefix}-signal:{name}' if prefix else f'signal:{name}').encode('utf-8')
             self._expire: int = expire
-            self._unlock_script = RedisScript(connection, RedisScriptField(UnlockScript()))
-            self._reset_script = RedisScript(connection, RedisScriptField(ResetScript()))
+            self._expire_ms: bytes = str(expire * 1000).encode('ascii')
+            self._signal_expire_ms: bytes = self._expire_ms if expire > 0 else SIGNAL_EXPIRE_MS
+            self._acquire_script, self._unlock_script, self._reset_script = scripts or _build_scripts(connection)
             self._acquired = False
             self._timed_out = False
         
         async def reset(self):
             """Forcibly deletes the lock. Use this with care.
             """
-            await self._reset_script(self._name, self._signal)
-            await self._delete_signal()
+            await self._reset_script.run((self._name, self._signal), (self._signal_expire_ms, ))
             self._timed_out = False
             self._acquired = False
 
@@ -88,18 +124,22 @@ class RedisLock(RedisRecordBase):
             Returns:
                 bool: returns if the lock is owned.
             """
-            return self._id == await self.get_owner_id()
+            owner = await self.get_owner_id()
+            return owner == (self._id_bytes if isinstance(owner, bytes) else self._id)
 
-        async def get_owner_id(self) -> str:
+        async def get_owner_id(self) -> Union[str, bytes]:
             """Get owner of the lock
 
             Returns:
-                str: owner of the lock
+                Union[str, bytes]: owner of the lock, bytes if the connection doesn't decode responses
             """
             return await self._client.get(self._name)
 
         async def acquire(self, blocking: bool = True, timeout: Optional[int] = None) -> bool:
             """Acquire lock
+            While waiting, BLPOP runs on a connection taken from the pool for this call only,
+            so other commands are not blocked by it. Don't acquire the lock while holding
+            an asyncio lock other coroutines need, as it would be held for the whole wait.
 
             Args:
                 blocking (bool, optional): blocking lock or not. Defaults to True.
@@ -111,9 +151,9 @@ class RedisLock(RedisRecordBase):
             Returns:
                 bool: the status of locking
             """
-            logger.debug(f'Trying to lock {self._name}')
+            logger.debug(f'Trying to lock {self._title}')
 
-            if await self.is_owner():
+            if self._acquired:
                 raise RedisLockError('Already acquired from this Lock instance.')
 
             if not blocking and timeout is not None:
@@ -128,20 +168,32 @@ class RedisLock(RedisRecordBase):
             busy = True
             blpop_timeout = timeout or self._expire or 0
             self._timed_out = False
-            while busy:
-                busy = not await self._client.set(self._name, self._id, exist=self._client.SET_IF_NOT_EXIST, expire=self._expire)
-                if busy:
-                    if self._timed_out:
-                        raise RedisLockTimeoutError(f'Lock is timed out {self._name}')
-                    elif blocking:
-                        self._timed_out = not await self._client.blpop(self._signal, blpop_timeout) and timeout != 0
+            status = await self._acquire_script.run((self._name, ), (self._id_bytes, self._expire_ms))
+            # the connection for BLPOP is taken only if waiting is needed and is held until acquired
+            connection: Optional[Connection] = None
+            try:
+                while busy:
+                    if status == 2:
+                        raise RedisLockError('Already acquired from this Lock instance.')
+                    busy = status != 0
+                    if busy:
+                        if self._timed_out:
+                            raise RedisLockTimeoutError(f'Lock is timed out {self._title}')
+                        elif blocking:
+                            if connection is None:
+                                connection = await self._client.connection_pool.get_connection('BLPOP')
+                            popped, status = await self._wait_and_acquire(connection, blpop_timeout)
+                            self._timed_out = not popped and timeout != 0
+                        else:
+                            logger.debug(f'Failed to get {self._title}')
+                            raise RedisLockError(f'Failed to get {self._title}')
                     else:
-                        logger.debug(f'Failed to get {self._name}')
-                        raise RedisLockError(f'Failed to get {self._name}')
-                else:
-                    self._acquired = True
+                        self._acquired = True
+            finally:
+                if connection is not None:
+                    await self._client.connection_pool.release(connection)
 
-            logger.debug(f'Locked {self._name}')
+            logger.debug(f'Locked {self._title}')
             return True
 
         async def __aenter__(self):
@@ -157,20 +209,40 @@ class RedisLock(RedisRecordBase):
                 RedisLockError: if already expired or not been locked or error while unlocking
             """
             self._acquired = False
-            logger.debug(f'Unlocking {self._name}')
+            logger.debug(f'Unlocking {self._title}')
             if self._timed_out:
                 await self._delete_signal()
                 return
-            error = await self._unlock_script(self._name, self._signal, self._id)
+            error = await self._unlock_script.run((self._name, self._signal), (self._id_bytes, self._signal_expire_ms))
             if error == 1:
-                raise RedisLockError(f'Lock {self._name} is not acquired')
+                raise RedisLockError(f'Lock {self._title} is not acquired')
             elif error:
                 raise RedisLockError(f'Unsupported error code {error} from UNLOCK script')
-            else:
-                await self._delete_signal()
+
+        async def _wait_and_acquire(self, connection: Connection, blpop_timeout: int) -> Tuple[Any, int]:
+            # waiting for the signal and the next acquire attempt are sent in one write
+            acquire_command = self._acquire_script.command((self._name, ), (self._id_bytes, self._expire_ms))
+            await connection.send_packed_command(connection.pack_commands([('BLPOP', self._signal, blpop_timeout), acquire_command]))
+            try:
+                popped = await connection.read_response()
+            except BaseException:
+                await connection.disconnect()
+                raise
+            try:
+                status = await connection.read_response()
+            except NoScriptError:
+                status = await self._acquire_script.run((self._name, ), (self._id_bytes, self._expire_ms))
+            except BaseException:
+                await connection.disconnect()
+                raise
+            return popped, status
 
         async def _delete_signal(self):
-            await self._client.delete(self._signal)
+            try:
+                await self._client.unlink(self._signal)
+            except ResponseError:
+                # UNLINK is not supported by redis < 4.0
+                await self._client.delete(self._signal)
     
     def __init__(self, connection: RedisConnection, lock_info: RedisLockField):
         """Constructor
@@ -180,6 +252,7 @@ class RedisLock(RedisRecordBase):
             lock_info (RedisLockField): redis lock field
         """
         super().__init__(connection, lock_info)
+        self._scripts = _build_scripts(connection)
 
     def get_lock(self, name: str) -> RealLock:
         """Get lock with name
@@ -190,4 +263,4 @@ class RedisLock(RedisRecordBase):
         Returns:
             RealLock: lock object
         """
-        return RedisLock.RealLock(self.connection, self.lock_info.id, self.lock_info.prefix, name, self.lock_info.expire)
+        return RedisLock.RealLock(self._connection, self._record_info.id, self._record_info.prefix, name, self._record_info.expire, self._scripts)
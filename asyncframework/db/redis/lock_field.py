@@ -1,5 +1,6 @@
 # -*- coding:utf-8 -*-
 from typing import Optional
+from itertools import count
 from uuid import uuid4
 from ._base import RedisRecordFieldBase
 
@@ -7,6 +8,11 @@ from ._base import RedisRecordFieldBase
 __all__ = ['RedisLockField']
 
 
+# lock ids are unique per process by the uuid and unique in the process by the counter
+_PROCESS_ID = uuid4().hex
+_counter = count()
+
+
 class RedisLockField(RedisRecordFieldBase):
     """Field for lock
     """
@@ -19,7 +25,7 @@ class RedisLockField(RedisRecordFieldBase):
             id (Optional[str], optional): lock id. Defaults to None.
         """
         super().__init__(prefix, expire)
-        self.id = str(uuid4()) if id is None else id
+        self.id = f'{_PROCESS_ID}-{next(_counter)}' if id is None else id
 
     def clone(self) -> 'RedisLockField':
         return RedisLockField(self.prefix, self.expire, self.id)
@@ -1,10 +1,10 @@
 # -*- coding:utf-8 -*-
-from typing import Union, Iterable, Optional, List, Generic, TypeVar, Tuple, Set
+from typing import Union, Optional, List, Generic, TypeVar, Tuple, Set, Any
 from asyncframework.log.log import get_logger
 from packets import PacketBase
 from .connection import RedisConnection
 from .record_field import RedisRecordField
-from ._base import RedisRecordBase
+from ._base import RedisRecordBase, BATCH_SIZE
 
 
 __all__ = ['RedisRecord']
@@ -25,10 +25,12 @@ class RedisRecord(RedisRecordBase, Generic[T]):
             connection (RedisConnection): connection to redis
             record_info (RedisRecordField): the record additional info
         """
+        assert issubclass(record_info.record_type, PacketBase)
         super().__init__(connection, record_info)
 
     async def load(self, mask: str = '*', count: Optional[int] = None) -> List[T]:
-        """Load elements from keys by mask
+        """Load elements from keys by mask.
+        Keys are scanned and loaded with MGET in batches.
 
         Args:
             mask (str, optional): mask for keys, not including prefix. Defaults to '*'.
@@ -37,49 +39,96 @@ class RedisRecord(RedisRecordBase, Generic[T]):
         Returns:
             List[T]: loaded PacketBase instances of key values
         """
+        if count is not None and count <= 0:
+            return []
         result: List[T] = []
         match = self._record_info.full_key(mask)
-        async for key in self._connection.iscan(match=match, count=count):
-            obj: T = await self._load(key)
-            result.append(obj)
+        keys: List[str] = []
+        left = count
+        async for key in self._connection.scan_iter(match=match, count=BATCH_SIZE):
+            keys.append(key)
+            if len(keys) >= BATCH_SIZE:
+                result.extend(await self._load_many(keys))
+                keys = []
+            if left is not None:
+                left -= 1
+                if left <= 0:
+                    break
+        if keys:
+            result.extend(await self._load_many(keys))
         return result
 
-    async def load_one(self, key: str) -> T:
-        """Load one value by key name
+    async def load_list(self, key: str) -> List[T]:
+        """Load the values stored as a list under one key
 
         Args:
             key (str): the key not including prefix
 
         Returns:
-            T: loaded PacketBase instance of value of the key
+            List[T]: loaded PacketBase instances of the list values
         """
-        match = self._record_info.full_key(key)
-        return await self._load(match)
+        values = await self._connection.lrange(self._record_info.full_key(key), 0, -1)
+        return list(map(self._record_info.load, values))
 
     async def store(self, key: Union[Union[List[str], Tuple[str]], str], data: Union[Union[List[T], Tuple[T], Set[T]], T], upsert=True) -> None:
-        storage: Iterable[tuple]
+        """Store values to keys.
+        Several keys are written with one pipeline.
+
+        Several values for a single key are stored as a redis list, read them back with `load_list`.
+
+        Args:
+            key (Union[Union[List[str], Tuple[str]], str]): the key or keys not including prefix
+            data (Union[Union[List[T], Tuple[T], Set[T]], T]): the value for all the keys or the values for each key
+            upsert (bool, optional): overwrite the existing keys. Defaults to True.
+        """
+        storage: List[Tuple[str, Any]]
+        full_key = self._record_info.full_key
+        dump = self._record_info.dump
         if isinstance(key, (list, tuple)):
             if isinstance(data, PacketBase):
-                v = data.dumps()
-                storage = ((x, v) for x in key)
+                v = dump(data)
+                storage = [(full_key(x), v) for x in key]
             elif isinstance(data, (list, tuple, set)):
                 if len(data) == len(key):
-                    storage = zip(self._record_info.full_keys(key), (x.dumps() for x in data))
+                    storage = [(full_key(x), dump(d)) for x, d in zip(key, data)]
                 else:
-                    raise AttributeError(f'Length of key array ({len(key)}) is not the same as of data array ({len(key)})')
+                    raise AttributeError(f'Length of key array ({len(key)}) is not the same as of data array ({len(data)})')
                 
         else:
             if isinstance(data, PacketBase):
-                storage = ((key, data.dumps()), )
+                storage = [(full_key(key), dump(data))]
             else:
-                storage = ((key, [d.dumps() for d in data]),)
-        exist = None if upsert else False
-        for k, v in storage:
-            await self._connection.set(k, v, expire=self._record_info.expire, exist=exist)
+                await self._store_list(full_key(key), [dump(d) for d in data], upsert)
+                return
+        expire = self._record_info.expire or None
+        nx = not upsert
+        if len(storage) == 1:
+            k, v = storage[0]
+            await self._connection.set(k, v, ex=expire, nx=nx)
+        else:
+            async with self._connection.pipeline(transaction=False) as pipe:
+                for k, v in storage:
+                    pipe.set(k, v, ex=expire, nx=nx)
+                await pipe.execute()
+
+    async def _store_list(self, key: str, values: List[Any], upsert: bool) -> None:
+        if not upsert and await self._connection.exists(key):
+            return
+        async with self._connection.pipeline(transaction=True) as pipe:
+            pipe.delete(key)
+            if values:
+                pipe.rpush(key, *values)
+                if self._record_info.expire:
+                    pipe.expire(key, self._record_info.expire)
+            await pipe.execute()
+
+    async def _load_many(self, keys: List[str]) -> List[T]:
+        load = self._record_info.load
+        values = await self._connection.mget(keys)
+        return [load(v) for v in values if v is not None]
 
     async def _load(self, key) -> Optional[T]:
-        assert issubclass(self._record_info.record_type, PacketBase)
         data = await self._connection.get(key)
-        if data:
-            return self._record_info.record_type.loads(data)
+        if data is not None:
+            return self._record_info.load(data)
         return None
@@ -1,5 +1,5 @@
 # -*- coding:utf-8 -*-
-from typing import Optional, Type, Union, Any
+from typing import Optional, Type, Union, Any, Callable
 from packets import PacketBase
 from ._base import RedisRecordFieldBase
 
@@ -7,19 +7,33 @@ from ._base import RedisRecordFieldBase
 __all__ = ['RedisRecordField']
 
 
+def _identity(data: Any) -> Any:
+    return data
+
+
 class RedisRecordField(RedisRecordFieldBase):
     """Redis record field
     """
-    def __init__(self, record_type: Union[Any, Type[PacketBase]], prefix: Optional[str] = None, expire: int = 0):
+    def __init__(self, record_type: Union[Any, Type[PacketBase]], prefix: Optional[str] = None, expire: int = 0, key_sep: str = ''):
         """Constructor
 
         Args:
             record_type (Type[PacketBase]): the packet type of the record value
             prefix (Optional[str], optional): record key prefix. Defaults to None.
             expire (int, optional): expiration in seconds (0 - not expiring). Defaults to 0.
+            key_sep (str, optional): separator between prefix and key. Defaults to ''.
         """
-        super().__init__(prefix, expire)
+        super().__init__(prefix, expire, key_sep)
         self.record_type: Union[Any, Type[PacketBase]] = record_type
+        self._is_packet: bool = isinstance(record_type, type) and issubclass(record_type, PacketBase)
+        self.dump: Callable[[Any], Any]
+        self.load: Callable[[Any], Any]
+        if self._is_packet:
+            self.dump = record_type.dumps
+            self.load = record_type.loads
+        else:
+            self.dump = _identity
+            self.load = _identity
 
     def clone(self) -> 'RedisRecordField':
-        return RedisRecordField(self.record_type, self.prefix, self.expire)
+        return RedisRecordField(self.record_type, self.prefix, self.expire, self.key_sep)
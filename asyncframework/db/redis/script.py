@@ -1,5 +1,5 @@
 # -*- coding: utf-8 -*-
-from typing import Any
+from typing import Any, Sequence, Tuple
 from redis.exceptions import NoScriptError
 from .connection import RedisConnection
 from .script_field import RedisScriptField
@@ -20,6 +20,7 @@ class RedisScript(RedisRecordBase):
             script_info (ScriptField): the `ScriptField` info for the script
         """
         super().__init__(connection, script_info)
+        self._loaded = False
     
     async def __call__(self, *args, **kwargs) -> Any:
         """Execute the script
@@ -27,10 +28,48 @@ class RedisScript(RedisRecordBase):
         Returns:
             Any: the result of execution
         """
-        keys_num = len(kwargs) + len(args)
-        keys_args = tuple(args) + tuple(kwargs.keys()) + tuple(kwargs.values()) if keys_num > 0 else []
+        if not args and not kwargs:
+            return await self.run()
+        if not kwargs:
+            return await self.run(args)
+        return await self.run([*args, *kwargs.keys()], list(kwargs.values()))
+
+    async def run(self, keys: Sequence[Any] = (), args: Sequence[Any] = ()) -> Any:
+        """Execute the script with separate keys and arguments.
+        The script is loaded on the first call, then only EVALSHA is sent.
+
+        Args:
+            keys (Sequence[Any], optional): the script KEYS. Defaults to ().
+            args (Sequence[Any], optional): the script ARGV. Defaults to ().
+
+        Returns:
+            Any: the result of execution
+        """
+        if not self._loaded:
+            await self.preload()
+        sha1 = self._record_info.code_sha1_bytes
         try:
-            result = await self._connection.evalsha(self._record_info.code_sha1, keys_num, *keys_args)
+            return await self._connection.evalsha(sha1, len(keys), *keys, *args)
         except NoScriptError:
-            result = await self._connection.eval(self._record_info.code, keys_num, *keys_args)
-        return result
+            # the script cache on the server was flushed
+            await self.preload()
+            return await self._connection.evalsha(sha1, len(keys), *keys, *args)
+
+    async def preload(self) -> None:
+        """Load the script to the server script cache
+        """
+        await self._connection.script_load(self._record_info.code)
+        self._loaded = True
+
+    def command(self, keys: Sequence[Any] = (), args: Sequence[Any] = ()) -> Tuple[Any, ...]:
+        """Build the EVALSHA command to send it with a pipeline or a dedicated connection.
+        The script must be already loaded on the server.
+
+        Args:
+            keys (Sequence[Any], optional): the script KEYS. Defaults to ().
+            args (Sequence[Any], optional): the script ARGV. Defaults to ().
+
+        Returns:
+            Tuple[Any, ...]: the command and its arguments
+        """
+        return ('EVALSHA', self._record_info.code_sha1_bytes, len(keys), *keys, *args)
@@ -1,30 +1,79 @@
 # -*- coding: utf-8 -*-
-from typing import Union
+import os
+import asyncio
+from typing import Union, Dict, Tuple, Type
+from weakref import WeakValueDictionary
+from functools import partial
 from hashlib import sha1
+from textwrap import dedent
 from ._base import RedisRecordFieldBase
 
 
 __all__ = ['RedisScriptField', 'RedisScriptData']
 
 
+# the sha1 is only the script identity for redis, so the non-security (non FIPS) path is used where supported
+try:
+    sha1(b'', usedforsecurity=False)
+    _sha1 = partial(sha1, usedforsecurity=False)
+except TypeError:
+    _sha1 = sha1
+# script data classes built from the script texts
+_SCRIPT_CLASS_CACHE: 'WeakValueDictionary[str, Type[RedisScriptData]]' = WeakValueDictionary()
+# sha1 of the script texts already seen
+_SCRIPT_SHA_CACHE: Dict[bytes, str] = {}
+# script data of the files already read with the modification time, keyed by the real path
+_SCRIPT_FILE_CACHE: Dict[str, Tuple[float, 'RedisScriptData']] = {}
+
+
+def _script_sha1(code: bytes) -> str:
+    code_sha1 = _SCRIPT_SHA_CACHE.get(code)
+    if code_sha1 is None:
+        code_sha1 = _SCRIPT_SHA_CACHE.setdefault(code, _sha1(code).hexdigest())
+    return code_sha1
+
+
+def _read_script(path: str) -> 'RedisScriptData':
+    path = os.path.realpath(path)
+    mtime = os.path.getmtime(path)
+    cached = _SCRIPT_FILE_CACHE.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'r') as f:
+        sd = f.read()
+    if not sd:
+        raise ValueError(f'Script file {path} is empty')
+    script_data = RedisScriptData.from_data(sd)()
+    _SCRIPT_FILE_CACHE[path] = (mtime, script_data)
+    return script_data
+
+
 class ScriptDataMeta(type):
     def __new__(cls, name, bases, namespace):
         assert 'code' in namespace.keys()
-        namespace['code_sha1'] = sha1(namespace.get('code').encode('utf-8')).hexdigest()
+        code = namespace.get('code')
+        if isinstance(code, str):
+            code = dedent(code).strip().encode('utf-8')
+        namespace['code'] = code
+        namespace['code_sha1'] = _script_sha1(code)
+        namespace['code_sha1_bytes'] = namespace['code_sha1'].encode('ascii')
         return super().__new__(cls, name, bases, namespace)
 
 
 class RedisScriptData(metaclass=ScriptDataMeta):
     """Script data.
     Stores the lua script itself and it's sha1.
+    The script text is dedented, stripped and stored as bytes.
     """
-    code: str = ''
+    code: bytes = b''
     code_sha1: str = ''
+    code_sha1_bytes: bytes = b''
 
     @classmethod
-    def from_data(cls, script_data: str) -> type['RedisScriptData']:
+    def from_data(cls, script_data: str) -> Type['RedisScriptData']:
         """Additional constructor.
-        Will build the ScriptData object from already 
+        Will build the ScriptData class from already read script text.
+        Classes are shared between the same script texts.
 
         Args:
             script_data (str): the script text
@@ -32,19 +81,22 @@ class RedisScriptData(metaclass=ScriptDataMeta):
         Returns:
             ScriptData: the built class
         """
-        namespace = {'code': script_data}
-        return type(cls.__name__, cls.__bases__, namespace)
+        script_class = _SCRIPT_CLASS_CACHE.get(script_data)
+        if script_class is None:
+            script_class = ScriptDataMeta(cls.__name__, (cls, ), {'code': script_data})
+            _SCRIPT_CLASS_CACHE[script_data] = script_class
+        return script_class
 
 
 class RedisScriptField(RedisRecordFieldBase):
     """Script field
     """
     @property
-    def code(self) -> str:
+    def code(self) -> bytes:
         """Returns the text of a script
 
         Returns:
-            str: the text of a script
+            bytes: the text of a script
         """
         return self._script_data.code
     
@@ -57,20 +109,48 @@ class RedisScriptField(RedisRecordFieldBase):
         """
         return self._script_data.code_sha1
 
+    @property
+    def code_sha1_bytes(self) -> bytes:
+        """Returns the encoded hex string of a sha1 of a script text
+
+        Returns:
+            bytes: hex digest of a sha1 of a script text as bytes
+        """
+        return self._script_data.code_sha1_bytes
+
     def __init__(self, script_or_path: Union[RedisScriptData, str]):
         """Constructor
 
+        Reading the script from a path blocks, use `from_path` to read it inside the running loop.
+
         Args:
             script_or_path (Union[ScriptData, str]): either the `ScriptData` or the path to a text file, containing the script
+
+        Raises:
+            ValueError: if the script file is empty
         """
         super().__init__()
         if isinstance(script_or_path, RedisScriptData):
             self._script_data = script_or_path
         else:
-            with open(script_or_path, 'r') as f:
-                sd = f.read()
-            if sd:
-                self._script_data = RedisScriptData.from_data(sd)()
+            self._script_data = _read_script(script_or_path)
+
+    @classmethod
+    async def from_path(cls, path: str) -> 'RedisScriptField':
+        """Additional constructor.
+        Reads the script file in the executor without blocking the event loop.
+
+        Args:
+            path (str): the path to a text file, containing the script
+
+        Raises:
+            ValueError: if the script file is empty
+
+        Returns:
+            RedisScriptField: the script field
+        """
+        sd = await asyncio.get_running_loop().run_in_executor(None, _read_script, path)
+        return cls(sd)
 
     def clone(self) -> 'RedisScriptField':
         return RedisScriptField(self._script_data)
@@ -1,22 +1,27 @@
 # -*- coding:utf-8 -*-
-from typing import Union, List, Any, Tuple, Optional
+from typing import Union, List, Any, Tuple, Optional, AsyncIterator, Iterable, Sequence, Dict
+from uuid import uuid4
 from asyncframework.log.log import get_logger
-from packets import PacketBase
 from .connection import RedisConnection
 from .set_field import RedisSetField
-from ._base import RedisRecordBase
+from ._base import RedisRecordBase, batched
 
 
 __all__ = ['RedisSet']
 
 
 DataType = Union[Any, Union[List[Any], Tuple[Any]]]
+# Maximum amount of members sent in one SADD/SREM command
+CHUNK_SIZE = 1024
+# Maximum amount of sources merged by one SUNIONSTORE command
+MERGE_CHUNK_SIZE = 64
 
 
 class RedisSet(RedisRecordBase):
     """Redis set
     """
     log = get_logger('redis_set')
+    _forward_commands = False
 
     def __init__(self, connection: RedisConnection, set_info: RedisSetField):
         """Constructor
@@ -26,21 +31,56 @@ class RedisSet(RedisRecordBase):
             set_info (SetField): set field info
         """
         super().__init__(connection, set_info)
-
-    def __getattr__(self, item):
-        return getattr(self._connection, item)
+        self._full_key = set_info.full_key
+        self._dump = set_info.dump
+        self._dump_many = set_info.dump_many
 
     async def load(self, key: str, count: Optional[int] = None) -> List[Any]:
         """Load set
 
         Args:
             key (str): set key
+            count (Optional[int], optional): load the set with SSCAN by batches of this size. Defaults to one SMEMBERS.
 
         Returns:
             List[Any]: resulting list of values
         """
-        result = await self._connection.smembers(self._record_info.full_key(key))
+        if count:
+            result = {value async for value in self._connection.sscan_iter(self._full_key(key), count=count)}
+        else:
+            result = await self._connection.smembers(self._full_key(key))
         return self._load(result)
+
+    async def load_many(self, keys: Sequence[str]) -> Dict[str, List[Any]]:
+        """Load several sets using one pipeline
+
+        Args:
+            keys (Sequence[str]): set keys
+
+        Returns:
+            Dict[str, List[Any]]: resulting values by set key
+        """
+        full_key = self._record_info.full_key
+        async with self._connection.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.smembers(full_key(key))
+            results = await pipe.execute()
+        return {key: self._load(result) for key, result in zip(keys, results)}
+
+    async def iter_load(self, key: str, count: int = CHUNK_SIZE) -> AsyncIterator[Any]:
+        """Iterate set values with SSCAN.
+        The same value may be returned more than once.
+
+        Args:
+            key (str): set key
+            count (int, optional): amount of values to fetch per SSCAN. Defaults to CHUNK_SIZE.
+
+        Yields:
+            Any: set value
+        """
+        load = self._record_info.load
+        async for value in self._connection.sscan_iter(self._record_info.full_key(key), count=count):
+            yield load(value)
     
     async def pop(self, key: str) -> Any:
         """Pop value from set
@@ -51,38 +91,117 @@ class RedisSet(RedisRecordBase):
         Returns:
             Any: the popped value
         """
-        data = await self._connection.spop(self._record_info.full_key(key))
+        data = await self._connection.spop(self._full_key(key))
         return self._load(data)
     
-    async def append(self, key: str, data: DataType) -> int:
+    async def append(self, key: str, data: DataType, chunk_size: int = CHUNK_SIZE) -> int:
         """Append value to set
 
         Args:
             key (str): set key
             data (DataType): set value to append
+            chunk_size (int, optional): maximum amount of values in one command, more values are sent with a pipeline. Defaults to CHUNK_SIZE.
+
+        Returns:
+            int: amount of added values
         """
-        if isinstance(self._record_info.record_type, PacketBase):
-            data = [x.dumps() for x in data] if isinstance(data, (list, tuple)) else [data.dumps(),]
-        elif not isinstance(data, (list, tuple)):
-            data = [data, ]
-        result = await self._connection.sadd(self._record_info.full_key(key), *data)
-        return result
-
-    async def remove(self, key: str, data: Union[Any, List[Any]]) -> int:
+        if isinstance(data, (list, tuple)):
+            return await self._chunked('SADD', self._full_key(key), self._dump_many(data), chunk_size)
+        return await self._connection.execute_command('SADD', self._full_key(key), self._dump(data))
+
+    async def remove(self, key: str, data: Union[Any, List[Any]], chunk_size: int = CHUNK_SIZE) -> int:
         """Remove data from set
 
         Args:
             key (str): set key
             data (Union[Any, List[Any]]): data to remove
+            chunk_size (int, optional): maximum amount of values in one command, more values are sent with a pipeline. Defaults to CHUNK_SIZE.
         
         Returns:
-            bool: True if removed successfully else False
+            int: amount of removed values
         """
-        if isinstance(self._record_info.record_type, PacketBase):
-            data = [x.dumps() for x in data] if isinstance(data, (list, tuple)) else [data.dumps(),]
-        elif not isinstance(data, (list, tuple)):
-            data = [data, ]
-        return await self._connection.srem(self._record_info.full_key(key), *data)
+        if isinstance(data, (list, tuple)):
+            return await self._chunked('SREM', self._full_key(key), self._dump_many(data), chunk_size)
+        return await self._connection.execute_command('SREM', self._full_key(key), self._dump(data))
+
+    async def append_many(self, pairs: Iterable[Tuple[str, DataType]]) -> List[int]:
+        """Append values to several sets using one pipeline
+
+        Args:
+            pairs (Iterable[Tuple[str, DataType]]): (set key, values to append) pairs
+
+        Returns:
+            List[int]: amount of added values for each set
+        """
+        return await self._many('SADD', pairs)
+
+    async def remove_many(self, pairs: Iterable[Tuple[str, DataType]]) -> List[int]:
+        """Remove values from several sets using one pipeline
+
+        Args:
+            pairs (Iterable[Tuple[str, DataType]]): (set key, values to remove) pairs
+
+        Returns:
+            List[int]: amount of removed values for each set
+        """
+        return await self._many('SREM', pairs)
+
+    async def size(self, key: str) -> int:
+        """Get the amount of values in set
+
+        Args:
+            key (str): set key
+
+        Returns:
+            int: amount of values
+        """
+        return await self._connection.scard(self._full_key(key))
+
+    async def contains(self, key: str, value: Any) -> bool:
+        """Check if value is in set
+
+        Args:
+            key (str): set key
+            value (Any): the value to check
+
+        Returns:
+            bool: True if the value is in set
+        """
+        return bool(await self._connection.sismember(self._full_key(key), self._dump(value)))
+
+    async def random(self, key: str, count: Optional[int] = None) -> Any:
+        """Get random values from set without removing them
+
+        Args:
+            key (str): set key
+            count (Optional[int], optional): amount of values. Defaults to one value.
+
+        Returns:
+            Any: the value or list of values if count is set
+        """
+        return self._load(await self._connection.srandmember(self._record_info.full_key(key), count))
+
+    async def intersection(self, *keys: str) -> List[Any]:
+        """Get values which are in all the sets
+
+        Args:
+            keys (str): set keys
+
+        Returns:
+            List[Any]: resulting list of values
+        """
+        return self._load(await self._connection.sinter(list(self._record_info.full_keys(keys))))
+
+    async def difference(self, *keys: str) -> List[Any]:
+        """Get values of the first set which are not in the other sets
+
+        Args:
+            keys (str): set keys
+
+        Returns:
+            List[Any]: resulting list of values
+        """
+        return self._load(await self._connection.sdiff(list(self._record_info.full_keys(keys))))
 
     async def merge(self, dest: str, *sources: str) -> None:
         """Merge sources and put them to destination
@@ -91,13 +210,49 @@ class RedisSet(RedisRecordBase):
             dest (str): destination key
             sources(str): source keys
         """
-        await self._connection.sunionstore(self._record_info.full_key(dest), *self._record_info.full_keys(sources))
+        dest_key = self._record_info.full_key(dest)
+        source_keys = list(self._record_info.full_keys(sources))
+        if len(source_keys) <= MERGE_CHUNK_SIZE:
+            await self._connection.sunionstore(dest_key, source_keys)
+            return
+        # many sources are merged by chunks into temporary sets, then the temporary sets into destination
+        temp_prefix = f'{dest_key}:merge:{uuid4().hex}:'
+        temp_keys = []
+        async with self._connection.pipeline(transaction=False) as pipe:
+            for i, chunk in enumerate(batched(source_keys, MERGE_CHUNK_SIZE)):
+                temp_key = f'{temp_prefix}{i}'
+                temp_keys.append(temp_key)
+                pipe.sunionstore(temp_key, chunk)
+            results = await pipe.execute(raise_on_error=False)
+            # the destination is written only if all the chunks are merged, as with a single SUNIONSTORE
+            error = next((result for result in results if isinstance(result, Exception)), None)
+            if error is None:
+                pipe.sunionstore(dest_key, temp_keys)
+            pipe.unlink(*temp_keys)
+            await pipe.execute()
+        if error is not None:
+            raise error
+
+    async def _many(self, command: str, pairs: Iterable[Tuple[str, DataType]]) -> List[int]:
+        full_key = self._record_info.full_key
+        dump_values = self._record_info.dump_values
+        async with self._connection.pipeline(transaction=False) as pipe:
+            execute_command = pipe.execute_command
+            for key, data in pairs:
+                execute_command(command, full_key(key), *dump_values(data))
+            return await pipe.execute()
+
+    async def _chunked(self, command: str, full_key: str, data: Tuple[Any, ...], chunk_size: int) -> int:
+        if len(data) <= chunk_size:
+            return await self._connection.execute_command(command, full_key, *data)
+        async with self._connection.pipeline(transaction=False) as pipe:
+            for chunk in batched(data, chunk_size):
+                pipe.execute_command(command, full_key, *chunk)
+            return sum(await pipe.execute())
 
     def _load(self, data: Union[Any, List[Any]]):
-        if isinstance(self._record_info.record_type, PacketBase):
-            if isinstance(data, (list, tuple)):
-                return [self._record_info.record_type.loads(x) for x in data]
-            else:
-                return self._record_info.record_type.loads(data)
-        else:
+        if not self._record_info._is_packet or data is None:
             return data
+        if isinstance(data, (list, tuple, set)):
+            return list(map(self._record_info.load, data))
+        return self._record_info.load(data)
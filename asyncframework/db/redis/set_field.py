@@ -1,5 +1,5 @@
 # -*- coding:utf-8 -*-
-from typing import Optional, Type, Union, Any
+from typing import Optional, Type, Union, Any, List, Tuple
 from packets import PacketBase
 from .record_field import RedisRecordField
 
@@ -10,15 +10,40 @@ __all__ = ['RedisSetField']
 class RedisSetField(RedisRecordField):
     """Field for the redis set
     """
-    def __init__(self, record_type: Union[Any, Type[PacketBase]], prefix: Optional[str] = None, expire: int = 0):
+    def __init__(self, record_type: Union[Any, Type[PacketBase]], prefix: Optional[str] = None, expire: int = 0, key_sep: str = ''):
         """Constructor
 
         Args:
             record_type (Union[Any, Type[PacketBase]]): the record type for set values
             prefix (Optional[str], optional): the prefix for set key. Defaults to None.
             expire (int, optional): expiration timeout in seconds. Defaults to 0.
+            key_sep (str, optional): separator between prefix and key. Defaults to ''.
         """
-        super().__init__(record_type, prefix, expire)
+        super().__init__(record_type, prefix, expire, key_sep)
+
+    def dump_values(self, data: Union[Any, List[Any]]) -> Tuple[Any, ...]:
+        """Serialize a value or a list of values of the set
+
+        Args:
+            data (Union[Any, List[Any]]): the value or values
+
+        Returns:
+            Tuple[Any, ...]: serialized values
+        """
+        if isinstance(data, (list, tuple)):
+            return self.dump_many(data)
+        return (self.dump(data), )
+
+    def dump_many(self, data: Union[List[Any], Tuple[Any, ...]]) -> Tuple[Any, ...]:
+        """Serialize a list of values of the set
+
+        Args:
+            data (Union[List[Any], Tuple[Any, ...]]): the values
+
+        Returns:
+            Tuple[Any, ...]: serialized values
+        """
+        return tuple(map(self.dump, data))
 
     def clone(self) -> 'RedisSetField':
-        return RedisSetField(self.record_type, self.prefix, self.expire)
+        return RedisSetField(self.record_type, self.prefix, self.expire, self.key_sep)
@@ -1,10 +1,10 @@
 # -*- coding:utf-8 -*-
-from typing import Union, List, Any, Tuple, Optional
-import asyncio
+from typing import Union, List, Any, Tuple, Optional, Sequence, Iterable, Dict, AsyncIterator
 from asyncframework.log.log import get_logger
-from packets import PacketBase
 from .connection import RedisConnection
 from .sorted_set_field import RedisSortedSetField, RedisSortedSetData
+from .script_field import RedisScriptField, RedisScriptData
+from .script import RedisScript
 from ._base import RedisRecordBase
 
 
@@ -12,12 +12,29 @@ __all__ = ['RedisSortedSet']
 
 
 DataType = Union[RedisSortedSetData, List[RedisSortedSetData]]
+# Amount of values fetched by one ZSCAN
+SCAN_CHUNK_SIZE = 1000
+
+
+class PopMinAndAddScript(RedisScriptData):
+    code = """
+local popped = redis.call("zpopmin", KEYS[1], 1)
+if #popped == 0 then
+    return false
+end
+redis.call("zadd", KEYS[1], ARGV[1], ARGV[2])
+return popped
+"""
+
+
+_POP_MIN_AND_ADD = RedisScriptField(PopMinAndAddScript())
 
 
 class RedisSortedSet(RedisRecordBase):
     """Redis set
     """
     log = get_logger('redis_set')
+    _forward_commands = False
 
     def __init__(self, connection: RedisConnection, set_info: RedisSortedSetField):
         """Constructor
@@ -27,9 +44,11 @@ class RedisSortedSet(RedisRecordBase):
             set_info (SetField): set field info
         """
         super().__init__(connection, set_info)
-
-    def __getattr__(self, item):
-        return getattr(self._connection, item)
+        self._dump_zadd_args = set_info.dump_zadd_args
+        self._dump_incr_args = set_info.dump_incr_args
+        self._load_with_scores = set_info.load_with_scores
+        self._load = set_info.load_values
+        self._pop_min_and_add_script = RedisScript(connection, _POP_MIN_AND_ADD)
 
     async def load(self, key: str, start: int = 0, end: int = -1, desc: bool = False, withscores=True) -> List[Union[RedisSortedSetData, Any]]:
         """Load set
@@ -46,6 +65,21 @@ class RedisSortedSet(RedisRecordBase):
         else:
             return self._load(result)
     
+    async def iter_load(self, key: str, count: int = SCAN_CHUNK_SIZE) -> AsyncIterator[RedisSortedSetData]:
+        """Iterate set values with ZSCAN in constant memory.
+        Values are not ordered by score.
+
+        Args:
+            key (str): set key
+            count (int, optional): amount of values to fetch per ZSCAN. Defaults to SCAN_CHUNK_SIZE.
+
+        Yields:
+            RedisSortedSetData: (score, value) pair
+        """
+        load = self._record_info.load
+        async for value, score in self._connection.zscan_iter(self._record_info.full_key(key), count=count):
+            yield score, load(value)
+
     async def range_by_score(self, key: str, min: float, max: float, start: Optional[int] = None, amount: Optional[int] = None, withscores=True) -> List[Union[RedisSortedSetData, Any]]:
         result = await self._connection.zrangebyscore(self._record_info.full_key(key), min, max, start, amount, withscores=withscores)
         if withscores:
@@ -53,103 +87,224 @@ class RedisSortedSet(RedisRecordBase):
         else:
             return self._load(result)
 
-    async def pop_min(self, key: str, count: Optional[int] = None) -> RedisSortedSetData:
-        """Pop value from set
+    async def load_many(self, keys: Sequence[str], start: int = 0, end: int = -1, desc: bool = False, withscores=True) -> Dict[str, List[Union[RedisSortedSetData, Any]]]:
+        """Load several sets using one pipeline
+
+        Args:
+            keys (Sequence[str]): set keys
+            start (int, optional): the first index. Defaults to 0.
+            end (int, optional): the last index. Defaults to -1.
+            desc (bool, optional): descending order. Defaults to False.
+            withscores (bool, optional): load values with scores. Defaults to True.
+
+        Returns:
+            Dict[str, List[Union[RedisSortedSetData, Any]]]: resulting values by set key
+        """
+        full_key = self._record_info.full_key
+        async with self._connection.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.zrange(full_key(key), start, end, desc=desc, withscores=withscores)
+            results = await pipe.execute()
+        load = self._load_with_scores if withscores else self._load
+        return {key: load(result) for key, result in zip(keys, results)}
+
+    async def range_by_score_many(self, keys: Sequence[str], min: float, max: float, start: Optional[int] = None, amount: Optional[int] = None, withscores=True) -> Dict[str, List[Union[RedisSortedSetData, Any]]]:
+        """Load values by score range from several sets using one pipeline
+
+        Args:
+            keys (Sequence[str]): set keys
+            min (float): minimal score
+            max (float): maximal score
+            start (Optional[int], optional): offset in the range. Defaults to None.
+            amount (Optional[int], optional): amount of values. Defaults to all values.
+            withscores (bool, optional): load values with scores. Defaults to True.
+
+        Returns:
+            Dict[str, List[Union[RedisSortedSetData, Any]]]: resulting values by set key
+        """
+        full_key = self._record_info.full_key
+        async with self._connection.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.zrangebyscore(full_key(key), min, max, start, amount, withscores=withscores)
+            results = await pipe.execute()
+        load = self._load_with_scores if withscores else self._load
+        return {key: load(result) for key, result in zip(keys, results)}
+
+    async def pop_min(self, key: str, count: Optional[int] = None) -> Union[Optional[RedisSortedSetData], List[RedisSortedSetData]]:
+        """Pop values with the lowest scores from set
+
+        Args:
+            key (str): set key
+            count (Optional[int], optional): amount of values to pop. Defaults to one value.
+
+        Returns:
+            Union[Optional[RedisSortedSetData], List[RedisSortedSetData]]: the popped (score, value) pair or None if the set is empty, the list of pairs if count is set
+        """
+        data = self._load_with_scores(await self._connection.zpopmin(self._record_info.full_key(key), count))
+        if count is None:
+            return data[0] if data else None
+        return data
+
+    async def pop_max(self, key: str, count: Optional[int] = None) -> Union[Optional[RedisSortedSetData], List[RedisSortedSetData]]:
+        """Pop values with the highest scores from set
 
         Args:
             key (str): set key
+            count (Optional[int], optional): amount of values to pop. Defaults to one value.
 
         Returns:
-            Any: the popped value
+            Union[Optional[RedisSortedSetData], List[RedisSortedSetData]]: the popped (score, value) pair or None if the set is empty, the list of pairs if count is set
         """
-        data = await self._connection.zpopmin(self._record_info.full_key(key), count)
-        return self._load(data)
+        data = self._load_with_scores(await self._connection.zpopmax(self._record_info.full_key(key), count))
+        if count is None:
+            return data[0] if data else None
+        return data
 
-    async def pop_max(self, key: str, count: Optional[int] = None) -> RedisSortedSetData:
-        """Pop value from set
+    async def pop_min_and_add(self, key: str, data: RedisSortedSetData) -> Optional[RedisSortedSetData]:
+        """Pop the value with the lowest score and add the new value in one round trip.
+        Nothing is added if the set is empty.
 
         Args:
             key (str): set key
+            data (RedisSortedSetData): (score, value) pair to add
 
         Returns:
-            Any: the popped value
+            Optional[RedisSortedSetData]: the popped (score, value) pair or None if the set is empty
         """
-        data = await self._connection.zpopmax(self._record_info.full_key(key), count)
-        return self._load(data)
+        score, value = self._dump_zadd_args(data)
+        popped = await self._pop_min_and_add_script.run((self._record_info.full_key(key), ), (score, value))
+        if not popped:
+            return None
+        return self._load_with_scores([(popped[0], float(popped[1]))])[0]
 
     async def count(self, key: str, min: float, max: float):
         return await self._connection.zcount(self._record_info.full_key(key), min, max)
 
-    async def append(self, key: str, data: DataType):
-        """Append value to set
+    async def size(self, key: str) -> int:
+        """Get the amount of values in set
+
+        Args:
+            key (str): set key
+
+        Returns:
+            int: amount of values
+        """
+        return await self._connection.zcard(self._record_info.full_key(key))
+
+    async def score(self, key: str, value: Any) -> Optional[float]:
+        """Get the score of value
+
+        Args:
+            key (str): set key
+            value (Any): the value
+
+        Returns:
+            Optional[float]: the score or None if the value is not in set
+        """
+        return await self._connection.zscore(self._record_info.full_key(key), self._record_info.dump(value))
+
+    async def rank(self, key: str, value: Any, desc: bool = False) -> Optional[int]:
+        """Get the index of value ordered by score
+
+        Args:
+            key (str): set key
+            value (Any): the value
+            desc (bool, optional): descending order. Defaults to False.
+
+        Returns:
+            Optional[int]: the index or None if the value is not in set
+        """
+        full_key = self._record_info.full_key(key)
+        if desc:
+            return await self._connection.zrevrank(full_key, self._record_info.dump(value))
+        return await self._connection.zrank(full_key, self._record_info.dump(value))
+
+    async def count_many(self, keys: Sequence[str], min: float, max: float) -> Dict[str, int]:
+        """Count values by score range in several sets using one pipeline
+
+        Args:
+            keys (Sequence[str]): set keys
+            min (float): minimal score
+            max (float): maximal score
+
+        Returns:
+            Dict[str, int]: amount of values by set key
+        """
+        full_key = self._record_info.full_key
+        async with self._connection.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.zcount(full_key(key), min, max)
+            results = await pipe.execute()
+        return dict(zip(keys, results))
+
+    async def append(self, key: str, data: DataType, gt: bool = False, lt: bool = False) -> int:
+        """Append value to set.
+        All the values are sent with one ZADD, the scores of existing values are replaced.
 
         Args:
             key (str): set key
             data (DataType): set value to append
+            gt (bool, optional): only raise the scores of existing values (score = max(score, new score)). Defaults to False.
+            lt (bool, optional): only lower the scores of existing values (score = min(score, new score)). Defaults to False.
+
+        Raises:
+            ValueError: if both gt and lt are set
+
+        Returns:
+            int: amount of added values
         """
-        if isinstance(self._record_info.record_type, PacketBase):
-            if isinstance(data, list):
-                store = {k.dumps(): v for (v, k) in data}
-            else:
-                store = {data[1].dumps(): data[0]}
-        else:
-            if isinstance(data, list):
-                store = {k: v for (v, k) in data}
-            else:
-                store = {data[1]: data[0]}
-        await self._connection.zadd(self._record_info.full_key(key), store)
-
-    async def incr(self, key: str, data: DataType):
-        if isinstance(self._record_info.record_type, PacketBase):
-            if isinstance(data, list):
-                store = {k.dumps(): v for (v, k) in data}
-            else:
-                store = {data[1].dumps(): data[0]}
-        else:
-            if isinstance(data, list):
-                store = {k: v for (v, k) in data}
-            else:
-                store = {data[1]: data[0]}
-        futures = []
-        for amount, value in store:
-            futures.append(self._connection.zincrby(self._record_info.full_key(key), amount, value))
-            if len(futures) % 100 == 0:
-                await asyncio.gather(*futures)
-                futures = []
-        if len(futures):
-            await asyncio.gather(*futures)
-            futures = []
-
-    async def remove(self, key: str, data: Union[Any, List[Any]]):
+        if gt and lt:
+            raise ValueError('Only one of gt and lt can be set')
+        args = self._dump_zadd_args(data)
+        if gt:
+            return await self._connection.execute_command('ZADD', self._record_info.full_key(key), 'GT', *args)
+        if lt:
+            return await self._connection.execute_command('ZADD', self._record_info.full_key(key), 'LT', *args)
+        return await self._connection.execute_command('ZADD', self._record_info.full_key(key), *args)
+
+    async def incr(self, key: str, data: DataType) -> None:
+        """Increment the scores of values (score = score + amount).
+        ZINCRBY takes one value, so the commands are sent with a pipeline.
+        Use `append` to replace the scores or with `gt`/`lt` to keep the maximal/minimal ones,
+        it is a single command.
+
+        Args:
+            key (str): set key
+            data (DataType): (amount, value) pair or pairs
+        """
+        # every pair is sent, so the amounts for the same value are all applied
+        args = iter(self._dump_incr_args(data))
+        full_key = self._record_info.full_key(key)
+        async with self._connection.pipeline(transaction=False) as pipe:
+            zincrby = pipe.zincrby
+            for amount, value in zip(args, args):
+                zincrby(full_key, amount, value)
+            await pipe.execute()
+
+    async def remove(self, key: str, data: Union[Any, List[Any]]) -> int:
         """Remove data from set
 
         Args:
             key (str): set key
             data (Union[Any, List[Any]]): data to remove
+
+        Returns:
+            int: amount of removed values
         """
-        if isinstance(self._record_info.record_type, PacketBase):
-            rem = [x.dumps() for x in data] if isinstance(data, (list, tuple)) else [data.dumps(),]
-        elif not isinstance(data, (list, tuple)):
-            rem = [data, ]
-        await self._connection.zrem(self._record_info.full_key(key), *rem)
-
-    def _load_with_scores(self, data: Union[RedisSortedSetData, List[RedisSortedSetData]]):
-        if isinstance(self._record_info.record_type, PacketBase):
-            if isinstance(data, list):
-                return [(y, self._record_info.record_type.loads(x)) for (x, y) in data]
-            else:
-                return (data[1], self._record_info.record_type.loads(data[0]))
-        else:
-            if isinstance(data, list):
-                return [(y, x) for (x, y) in data]
-            else:
-                return (data[1], data[0])
-
-    def _load(self, data: Union[Any, List[Any]]):
-        if isinstance(self._record_info.record_type, PacketBase):
-            if isinstance(data, (list, tuple)):
-                return [self._record_info.record_type.loads(x) for x in data]
-            else:
-                return self._record_info.record_type.loads(data)
-        else:
-            return data
+        return await self._connection.zrem(self._record_info.full_key(key), *self._record_info.dump_values(data))
+
+    async def remove_many(self, pairs: Iterable[Tuple[str, Union[Any, List[Any]]]]) -> List[int]:
+        """Remove values from several sets using one pipeline
+
+        Args:
+            pairs (Iterable[Tuple[str, Union[Any, List[Any]]]]): (set key, values to remove) pairs
+
+        Returns:
+            List[int]: amount of removed values for each set
+        """
+        full_key = self._record_info.full_key
+        dump_values = self._record_info.dump_values
+        async with self._connection.pipeline(transaction=False) as pipe:
+            for key, data in pairs:
+                pipe.zrem(full_key(key), *dump_values(data))
+            return await pipe.execute()
@@ -1,7 +1,9 @@
 # -*- coding:utf-8 -*-
-from typing import Optional, Type, Union, Any, Tuple
+from typing import Optional, Type, Union, Any, Tuple, List, Callable
+from operator import itemgetter
+from itertools import chain
 from packets import PacketBase
-from .record_field import RedisRecordField
+from .record_field import RedisRecordField, _identity
 
 
 __all__ = ['RedisSortedSetField', 'RedisSortedSetData']
@@ -10,18 +12,108 @@ __all__ = ['RedisSortedSetField', 'RedisSortedSetData']
 RedisSortedSetData = Tuple[float, Union[Any, PacketBase]]
 
 
+# (value, score) pairs from redis are turned to (score, value) pairs
+_swap = itemgetter(1, 0)
+_value = itemgetter(0)
+_score = itemgetter(1)
+# (score, value) pairs of the user data
+_data_score = itemgetter(0)
+_data_value = itemgetter(1)
+
+
+def _dump_raw_zadd_args(data: Union[RedisSortedSetData, List[RedisSortedSetData]]) -> List[Any]:
+    if isinstance(data, list):
+        return list(chain.from_iterable(data))
+    return [data[0], data[1]]
+
+
+def _load_raw_with_scores(data: List[Tuple[Any, float]]) -> List[RedisSortedSetData]:
+    return list(map(_swap, data))
+
+
 class RedisSortedSetField(RedisRecordField):
     """Field for the redis set
     """
-    def __init__(self, record_type: Union[Any, Type[PacketBase]], prefix: Optional[str] = None, expire: int = 0):
+    def __init__(self, record_type: Union[Any, Type[PacketBase]], prefix: Optional[str] = None, expire: int = 0, key_sep: str = '', quantize_scores: bool = False):
         """Constructor
 
         Args:
             record_type (Union[Any, Type[PacketBase]]): the record type for set values
             prefix (Optional[str], optional): the prefix for set key. Defaults to None.
             expire (int, optional): expiration timeout in seconds. Defaults to 0.
+            key_sep (str, optional): separator between prefix and key. Defaults to ''.
+            quantize_scores (bool, optional): send the ZADD scores as integers, dropping the fractional part. Increments are sent as is. Defaults to False.
+        """
+        super().__init__(record_type, prefix, expire, key_sep)
+        self.quantize_scores = quantize_scores
+        self.dump_incr_args: Callable[[Union[RedisSortedSetData, List[RedisSortedSetData]]], List[Any]]
+        self.dump_incr_args = self._dump_values_zadd_args if self._is_packet else _dump_raw_zadd_args
+        self.dump_zadd_args: Callable[[Union[RedisSortedSetData, List[RedisSortedSetData]]], List[Any]]
+        self.dump_zadd_args = self._dump_quantized_zadd_args if quantize_scores else self.dump_incr_args
+        if not self._is_packet:
+            self.load_with_scores = _load_raw_with_scores
+            self.load_values = _identity
+
+    def _dump_values_zadd_args(self, data: Union[RedisSortedSetData, List[RedisSortedSetData]]) -> List[Any]:
+        """Serialize a (score, value) pair or a list of pairs to the flat ZADD arguments
+
+        Args:
+            data (Union[RedisSortedSetData, List[RedisSortedSetData]]): the pair or pairs
+
+        Returns:
+            List[Any]: score and serialized value of every pair
+        """
+        if isinstance(data, list):
+            return list(chain.from_iterable(zip(map(_data_score, data), map(self.dump, map(_data_value, data)))))
+        return [data[0], self.dump(data[1])]
+
+    def _dump_quantized_zadd_args(self, data: Union[RedisSortedSetData, List[RedisSortedSetData]]) -> List[Any]:
+        """Serialize a (score, value) pair or a list of pairs to the flat ZADD arguments with integer scores
+
+        Args:
+            data (Union[RedisSortedSetData, List[RedisSortedSetData]]): the pair or pairs
+
+        Returns:
+            List[Any]: integer score and serialized value of every pair
+        """
+        if isinstance(data, list):
+            return list(chain.from_iterable(zip(map(int, map(_data_score, data)), map(self.dump, map(_data_value, data)))))
+        return [int(data[0]), self.dump(data[1])]
+
+    def load_with_scores(self, data: List[Tuple[Any, float]]) -> List[RedisSortedSetData]:
+        """Deserialize a list of (value, score) pairs got from redis
+
+        Args:
+            data (List[Tuple[Any, float]]): the pairs
+
+        Returns:
+            List[RedisSortedSetData]: (score, value) pairs
+        """
+        return list(zip(map(_score, data), map(self.load, map(_value, data))))
+
+    def load_values(self, data: List[Any]) -> List[Any]:
+        """Deserialize a list of values got from redis
+
+        Args:
+            data (List[Any]): the values
+
+        Returns:
+            List[Any]: deserialized values
+        """
+        return list(map(self.load, data))
+
+    def dump_values(self, data: Union[Any, List[Any]]) -> Tuple[Any, ...]:
+        """Serialize a value or a list of values of the set
+
+        Args:
+            data (Union[Any, List[Any]]): the value or values
+
+        Returns:
+            Tuple[Any, ...]: serialized values
         """
-        super().__init__(record_type, prefix, expire)
+        if isinstance(data, (list, tuple)):
+            return tuple(map(self.dump, data))
+        return (self.dump(data), )
 
     def clone(self) -> 'RedisSortedSetField':
-        return RedisSortedSetField(self.record_type, self.prefix, self.expire)
+        return RedisSortedSetField(self.record_type, self.prefix, self.expire, self.key_sep, self.quantize_scores)
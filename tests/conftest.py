@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+import asyncio
+from types import SimpleNamespace
+import pytest
+fakeredis = pytest.importorskip('fakeredis')
+pytest.importorskip('lupa')
+from fakeredis.aioredis import FakeConnection
+from redis.asyncio import ConnectionPool
+from asyncframework.db.redis import connection
+
+
+@pytest.fixture
+def redis_server(monkeypatch):
+    """Fake redis server, all the connections opened in the test are made to it
+    """
+    server = fakeredis.FakeServer()
+
+    def from_url(url, **kwargs):
+        return ConnectionPool(connection_class=FakeConnection, server=server, **kwargs)
+
+    monkeypatch.setattr(connection, 'ConnectionPool', SimpleNamespace(from_url=from_url))
+    return server
+
+
+@pytest.fixture
+def run():
+    """Run the coroutine to completion in a new event loop
+    """
+    return asyncio.run
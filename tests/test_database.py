@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from asyncframework.db.redis import RedisDb, RedisSetField, RedisSortedSetField, RedisSet, RedisSortedSet
+
+
+class FullDb(RedisDb):
+    tags = RedisSetField(str, 'tg')
+    scores = RedisSortedSetField(str, 'sc')
+
+
+class BytesDb(RedisDb):
+    decode_responses = False
+    tags = RedisSetField(str, 'tg')
+
+
+def test_with_records():
+    partial_class = FullDb.with_records('tags')
+    assert list(partial_class.__records__) == ['tags']
+    field, record_class = partial_class.__records__['tags']
+    assert record_class is RedisSet
+    assert field is not FullDb.__records__['tags'][0]
+    assert field.full_key('a') == 'tga'
+    assert FullDb.__records__['scores'][1] is RedisSortedSet
+
+
+def test_with_records_keeps_decode_responses(redis_server, run):
+    async def main():
+        db = BytesDb.with_records('tags')('redis://localhost')
+        await db.start()
+        await db.tags.append('a', 'x')
+        assert await db.tags.load('a') == {b'x'}
+        await db.stop()
+    run(main())
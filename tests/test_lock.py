@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import pytest
+from asyncframework.db.redis import RedisDb, RedisLockField, RedisLockError
+from asyncframework.db.redis.lock import RedisLockTimeoutError
+
+
+class LockDb(RedisDb):
+    locks = RedisLockField('lk', expire=5)
+    # the same lock keys owned by another id, as another process would
+    others = RedisLockField('lk', expire=5)
+    forever = RedisLockField('fl')
+
+
+async def started_db() -> LockDb:
+    db = LockDb('redis://localhost')
+    await db.start()
+    return db
+
+
+def test_acquire_release(redis_server, run):
+    async def main():
+        db = await started_db()
+        lock = db.locks.get_lock('L')
+        assert await lock.acquire()
+        assert await lock.is_owner()
+        await lock.release()
+        assert await db.locks.get_lock('L').get_owner_id() is None
+        await db.stop()
+    run(main())
+
+
+def test_signal_expires(redis_server, run):
+    async def main():
+        db = await started_db()
+        for record, name in ((db.locks, 'lk-signal:L'), (db.forever, 'fl-signal:L')):
+            lock = record.get_lock('L')
+            await lock.acquire()
+            await lock.release()
+            assert await db.locks.pttl(name) > 0
+        await db.stop()
+    run(main())
+
+
+def test_non_blocking_busy(redis_server, run):
+    async def main():
+        db = await started_db()
+        owner = db.locks.get_lock('L')
+        await owner.acquire()
+        with pytest.raises(RedisLockError):
+            await db.others.get_lock('L').acquire(blocking=False)
+        await owner.release()
+        other = db.others.get_lock('L')
+        assert await other.acquire(blocking=False)
+        await other.release()
+        await db.stop()
+    run(main())
+
+
+def test_already_acquired(redis_server, run):
+    async def main():
+        db = await started_db()
+        lock = db.locks.get_lock('L')
+        await lock.acquire()
+        with pytest.raises(RedisLockError):
+            await lock.acquire()
+        await lock.release()
+        await db.stop()
+    run(main())
+
+
+def test_contention(redis_server, run):
+    async def main():
+        db = await started_db()
+        owner = db.locks.get_lock('L')
+        await owner.acquire()
+        waiter = db.others.get_lock('L')
+
+        async def release_later():
+            await asyncio.sleep(0.2)
+            await owner.release()
+
+        releasing = asyncio.ensure_future(release_later())
+        assert await waiter.acquire(timeout=3)
+        await releasing
+        assert await waiter.is_owner()
+        await waiter.release()
+        await db.stop()
+    run(main())
+
+
+def test_timeout(redis_server, run):
+    async def main():
+        db = await started_db()
+        owner = db.locks.get_lock('L')
+        await owner.acquire()
+        waiter = db.others.get_lock('L')
+        with pytest.raises(RedisLockTimeoutError):
+            await waiter.acquire(timeout=1)
+        assert await owner.is_owner()
+        await owner.release()
+        await db.stop()
+    run(main())
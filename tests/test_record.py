@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from packets import Packet, makeField
+from packets.processors import int_t, string_t
+from asyncframework.db.redis import RedisDb, RedisRecordField
+
+
+class Item(Packet):
+    id = makeField(int_t, required=True)
+    name = makeField(string_t)
+
+
+class ItemDb(RedisDb):
+    items = RedisRecordField(Item, 'it', key_sep=':')
+
+
+def test_store_prefixes_keys(redis_server, run):
+    async def main():
+        db = ItemDb('redis://localhost')
+        await db.start()
+        first = Item(id=1, name='one')
+        second = Item(id=2, name='two')
+        await db.items.store('1', first)
+        await db.items.store(['2', '3'], [second, first])
+        await db.items.store(['4', '5'], second)
+        assert await db.items.exists('it:1') == 1
+        assert await db.items.exists('1') == 0
+        assert sorted(await db.items.keys('it:*')) == ['it:1', 'it:2', 'it:3', 'it:4', 'it:5']
+        assert await db.items.load('1') == [first]
+        assert await db.items.load('3') == [first]
+        assert await db.items.load('5') == [second]
+        await db.items.store('l', [first, second])
+        assert await db.items.load_list('l') == [first, second]
+        await db.stop()
+    run(main())
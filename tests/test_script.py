@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from hashlib import sha1
+from asyncframework.db.redis import RedisDb, RedisScriptData, RedisScriptField
+
+
+class CountScript(RedisScriptData):
+    code = 'return {#KEYS, #ARGV}'
+
+
+class ScriptDb(RedisDb):
+    count = RedisScriptField(CountScript())
+
+
+def test_from_data_subclass():
+    text = 'return 1'
+    script_class = RedisScriptData.from_data(text)
+    assert issubclass(script_class, RedisScriptData)
+    assert isinstance(script_class(), RedisScriptData)
+    assert script_class.code == b'return 1'
+    assert script_class.code_sha1 == sha1(b'return 1').hexdigest()
+    assert RedisScriptData.from_data(text) is script_class
+    assert issubclass(CountScript.from_data('return 2'), CountScript)
+
+
+def test_call_keys_and_args(redis_server, run):
+    async def main():
+        db = ScriptDb('redis://localhost')
+        await db.start()
+        assert await db.count() == [0, 0]
+        assert await db.count('a', 'b') == [2, 0]
+        assert await db.count('a', b=1, c=2) == [3, 2]
+        assert await db.count.run(['a'], [1, 2, 3]) == [1, 3]
+        await db.stop()
+    run(main())
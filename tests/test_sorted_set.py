@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from asyncframework.db.redis import RedisDb, RedisSortedSetField
+
+
+class ScoreDb(RedisDb):
+    scores = RedisSortedSetField(str, 'sc')
+    quantized = RedisSortedSetField(str, 'qs', quantize_scores=True)
+
+
+def test_incr(redis_server, run):
+    async def main():
+        db = ScoreDb('redis://localhost')
+        await db.start()
+        await db.scores.append('a', [(1, 'x'), (2, 'y')])
+        await db.scores.incr('a', [(1.5, 'x'), (3, 'z')])
+        assert await db.scores.load('a') == [(2.0, 'y'), (2.5, 'x'), (3.0, 'z')]
+        await db.scores.incr('a', [(1, 'y'), (1, 'y')])
+        assert await db.scores.score('a', 'y') == 4.0
+        await db.stop()
+    run(main())
+
+
+def test_quantized_incr(redis_server, run):
+    async def main():
+        db = ScoreDb('redis://localhost')
+        await db.start()
+        await db.quantized.append('a', (1.7, 'x'))
+        await db.quantized.incr('a', (0.5, 'x'))
+        assert await db.quantized.score('a', 'x') == 1.5
+        await db.stop()
+    run(main())